@@ -1,103 +1,577 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """Utility module that simplifies common tasks for update scripts like querying the latest version of a project."""
 
-from __future__ import absolute_import
-from __future__ import division
-from __future__ import print_function
-from __future__ import unicode_literals
-
 import argparse
-import collections
+import builtins
+import functools
+import hashlib
+import heapq
+import json
 import os
 import re
-import requests
+import sqlite3
 import subprocess
 import sys
+import tempfile
+import threading
 import time
-from pyquery import PyQuery
-
-try:
-    import typing  # noqa: F401  # pylint: disable=unused-import
-    from typing import (  # noqa: F401  # pylint: disable=unused-import
-        cast,
-        Any,
-        AnyStr,
-        Callable,
-        Dict,
-        Iterable,
-        IO,
-        Iterator,
-        List,
-        Match,
-        NamedTuple,
-        Optional,
-        Text,
-        Tuple,
-        Union,
+import typing  # noqa: F401  # pylint: disable=unused-import
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import (  # noqa: F401  # pylint: disable=unused-import
+    cast,
+    Any,
+    AnyStr,
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    IO,
+    Iterator,
+    List,
+    Match,
+    NamedTuple,
+    Optional,
+    Set,
+    Text,
+    Tuple,
+    Union,
+)
+
+if typing.TYPE_CHECKING:
+    # only needed for type comments, the modules are imported lazily on first use
+    import requests  # noqa: F401  # pylint: disable=unused-import
+    from lxml import etree  # noqa: F401  # pylint: disable=unused-import
+
+DEFAULT_VERSION_PATTERN = r"[vV]?(\d+)\.(\d+)(?:\.(\d+))?$"
+# bytes variant for matching raw git output (``\d`` only matches ASCII digits in bytes patterns)
+DEFAULT_VERSION_PATTERN_BYTES = DEFAULT_VERSION_PATTERN.encode("ascii")
+MAX_TRIES_FOR_PAGE_DOWNLOAD = 3
+BACKOFF_FACTOR_BETWEEN_PAGE_DOWNLOAD_TRIES = 1  # wait time doubles with each retry
+MAX_CONCURRENT_URL_VERIFICATIONS = 16
+PAGE_DOWNLOAD_TIMEOUT = (5, 30)  # (connect, read) timeouts in seconds
+URL_VERIFICATION_TIMEOUT = (5, 15)
+PAGE_DOWNLOAD_CHUNK_SIZE = 16384
+MAX_API_PAGES_FOR_TAG_QUERY = 3  # GitHub allows only 60 unauthenticated API requests per hour
+CACHE_DIRECTORY = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "zsh-updater")
+VERSION_CACHE_FILEPATH = os.path.join(CACHE_DIRECTORY, "versions.sqlite")
+VERSION_CACHE_TTL = 3600  # in seconds
+KNOWN_FILE_EXTENSIONS = ("gzip", "tar", "tgz", "tar.gz", "tar.bz2", "tar.xz", "zip")
+
+# longest extensions first, so for example ``.tar.gz`` is preferred over a (hypothetical) ``.gz`` extension
+KNOWN_DOTTED_EXTENSIONS = tuple(sorted((".{}".format(e) for e in KNOWN_FILE_EXTENSIONS), key=len, reverse=True))
+
+# The default version pattern combined with the removal of path components and known file extensions (see
+# ``remove_path_components`` in ``VersionQuery.last_website_version``): The pattern cannot match across ``/`` and the
+# file extension is only checked with a lookahead, so the match equals the result of the default pattern applied to the
+# extracted file name without extension.
+_FUSED_VERSION_RE = re.compile(
+    "{}(?=(?:{})?$)".format(
+        DEFAULT_VERSION_PATTERN[: -len("$")], "|".join(re.escape(e) for e in KNOWN_DOTTED_EXTENSIONS)
     )
-except ImportError:
+)
+_URL_PLACEHOLDER_RE = re.compile(r"\{(.+)\}")
+# builtins that are available in version string filter expressions of ``url_verifier``
+_URL_FILTER_BUILTINS = {
+    name: getattr(builtins, name)
+    for name in (
+        "abs all any bool chr enumerate filter float format hex int len list map max min ord range repr reversed round "
+        "sorted str sum tuple zip"
+    ).split()
+}  # type: Dict[Text, Any]
+_TAG_REF_PREFIX = b"refs/tags/"
+_TAG_REF_PREFIX_LENGTH = len(_TAG_REF_PREFIX)
+
+_SESSION = None  # type: Optional[requests.Session]
+_SESSION_LOCK = threading.Lock()
+
+VersionMatch = NamedTuple("VersionMatch", [("complete_match", Text), ("groups", Tuple[Optional[Text], ...])])
+
+
+@functools.lru_cache(maxsize=256)
+def _compiled(pattern):
+    # type: (AnyStr) -> typing.Pattern
+    """Compile a regular expression and cache the result for later calls with the same pattern.
+
+    :param pattern: regular expression to compile
+    :type pattern: AnyStr
+    :returns: the compiled regular expression
+    :rtype: typing.Pattern
+
+    """
+    return re.compile(pattern)
+
+
+def _literal_prefix(pattern):
+    # type: (Text) -> Text
+    """Return the literal text that every match of a regular expression (matched from the start) begins with.
+
+    The prefix is determined conservatively: it ends at the first special character and an empty string is returned
+    for patterns with alternatives.
+
+    :param pattern: regular expression
+    :type pattern: Text
+    :returns: the literal prefix of the pattern (may be empty)
+    :rtype: Text
+
+    """
+    if "|" in pattern:
+        return ""
+    prefix_length = 0
+    while prefix_length < len(pattern) and pattern[prefix_length] not in "\\.^$*+?{}[]()":
+        prefix_length += 1
+    # the last literal character is optional or repeated if it is followed by a quantifier
+    if prefix_length < len(pattern) and pattern[prefix_length] in "*?{":
+        prefix_length -= 1
+    return pattern[: max(prefix_length, 0)]
+
 
-    class TypeDummyClass(object):
-        """Dummy class that prevents code breaking for ``Type`` casts if the ``typing`` module is not available."""
+def _session():
+    # type: () -> requests.Session
+    """Return the ``requests`` session that is shared by all http requests of this module.
 
-        def __getitem__(self, item):
-            # type: (str) -> None
-            """Make subscription work on instances of this class.
+    The session (and the ``requests`` module) is only loaded on first use, so command line calls without any http
+    requests do not pay the import cost.
 
-            Dummy method to make
+    :returns: the shared session
+    :rtype: requests.Session
 
-            .. code-block:: python
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            import requests  # noqa: F811
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            # Server errors are retried with exponential backoff, all other errors are terminal
+            retry = Retry(
+                total=MAX_TRIES_FOR_PAGE_DOWNLOAD - 1,
+                backoff_factor=BACKOFF_FACTOR_BETWEEN_PAGE_DOWNLOAD_TRIES,
+                status_forcelist=(500, 502, 503, 504),
+                raise_on_status=False,
+            )
+            session = requests.Session()
+            session.headers["Connection"] = "keep-alive"
+            for prefix in ("https://", "http://"):
+                session.mount(prefix, HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry))
+            _SESSION = session
+    return _SESSION
+
+
+@functools.lru_cache(maxsize=64)
+def _compiled_filter_expression(expression):
+    # type: (Text) -> Any
+    """Compile a version string filter expression to a lambda code object and cache the result.
+
+    :param expression: Python expression that manipulates a version string ``x``
+    :type expression: Text
+    :returns: a code object that evaluates to a lambda function applying the expression
+    :rtype: Any
+
+    """
+    return compile("lambda x: {}".format(expression), "<url_verifier>", "eval")
+
+
+@functools.lru_cache(maxsize=128)
+def _selector_xpath(selector, attribute, select_elements=False):
+    # type: (Text, Optional[Text], bool) -> etree.XPath
+    """Translate a css selector to a compiled XPath expression and cache the result.
+
+    The XPath expression directly extracts the given attribute of all matching html tags or their inner text if no
+    attribute is given.
+
+    :param selector: css selector for html tag filtering
+    :type selector: Text
+    :param attribute: attribute to extract; if ``None``, the inner text is extracted instead
+    :type attribute: Optional[Text]
+    :param select_elements: return the matching html tags themselves instead of extracting texts from them
+    :type select_elements: bool
+    :returns: the compiled XPath expression
+    :rtype: etree.XPath
+
+    """
+    from cssselect import HTMLTranslator
+    from lxml import etree  # noqa: F811
+
+    selector_path = "({})".format(HTMLTranslator().css_to_xpath(selector))
+    if not select_elements:
+        if attribute is not None:
+            selector_path += "/@{}".format(attribute)
+        else:
+            # equivalent to the ``text`` attribute of lxml elements (text before the first child element)
+            selector_path += "/node()[1][self::text()]"
+    return etree.XPath(selector_path, smart_strings=False)
 
-                foo['anystring']
 
+def _write_file_atomically(filepath, content):
+    # type: (Text, bytes) -> None
+    """Write ``content`` to a temporary file and replace the file at ``filepath`` with it.
 
-            constructs working for an instance foo of this class.
+    Readers either see the old or the new file content, but never a partially written file.
 
-            :param item: a item that should be accessed
-            :type item: str
-            :returns: None because this is a dummy method
+    :param filepath: path of the file to write
+    :type filepath: Text
+    :param content: the new file content
+    :type content: bytes
+
+    """
+    file_descriptor, temp_filepath = tempfile.mkstemp(dir=os.path.dirname(filepath), prefix=".tmp-")
+    try:
+        with os.fdopen(file_descriptor, "wb") as f:
+            f.write(content)
+        os.replace(temp_filepath, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_filepath)
+        except OSError:
+            pass
+        raise
+
+
+def _iter_page_chunks(url):
+    # type: (Text) -> Generator[bytes, None, None]
+    """Download a web page and yield its content in chunks as soon as they arrive.
+
+    Downloaded pages are cached in ``CACHE_DIRECTORY`` together with their ``ETag`` and ``Last-Modified`` headers.
+    Subsequent downloads of the same url are sent as conditional requests, so an unmodified page is answered with an
+    empty ``304`` response and read from the cache instead. The cache files are replaced atomically and the metadata
+    contains a checksum of the content, so a metadata file is never used with the content of another download (for
+    example from a concurrent process). Server errors are retried by the shared session (see
+    :func:`_session`). If the iteration is stopped early, the download is aborted and the page is not cached.
+
+    :param url: url of the page to download
+    :type url: Text
+    :returns: a generator over the chunks of the page content
+    :rtype: Generator[bytes, None, None]
+
+    """
+    import requests  # noqa: F811
+
+    cache_filepath_prefix = os.path.join(CACHE_DIRECTORY, "pages", hashlib.sha256(url.encode("utf-8")).hexdigest())
+    cache_metadata_filepath = cache_filepath_prefix + ".json"
+    cache_content_filepath = cache_filepath_prefix + ".html"
+    cached_content = None  # type: Optional[bytes]
+    conditional_headers = {}  # type: Dict[Text, Text]
+    try:
+        with open(cache_metadata_filepath, "r") as f:
+            cache_metadata = json.load(f)
+        with open(cache_content_filepath, "rb") as f:
+            cached_content = f.read()
+        if cache_metadata.get("content_sha256") != hashlib.sha256(cached_content).hexdigest():
+            raise ValueError("The cached page content does not belong to the cached metadata.")
+        if cache_metadata.get("etag") is not None:
+            conditional_headers["If-None-Match"] = cache_metadata["etag"]
+        if cache_metadata.get("last_modified") is not None:
+            conditional_headers["If-Modified-Since"] = cache_metadata["last_modified"]
+    except (OSError, ValueError):
+        cached_content = None
+    response = _session().get(url, headers=conditional_headers, timeout=PAGE_DOWNLOAD_TIMEOUT, stream=True)
+    if response.status_code != 200:
+        response.close()
+        if response.status_code == 304 and cached_content is not None:
+            yield cached_content
+            return
+        raise requests.exceptions.HTTPError("{} could not be downloaded".format(url))
+    cache_metadata = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    is_cacheable = cache_metadata["etag"] is not None or cache_metadata["last_modified"] is not None
+    content_chunks = []  # type: List[bytes]
+    with response:
+        for chunk in response.iter_content(PAGE_DOWNLOAD_CHUNK_SIZE):
+            if is_cacheable:
+                content_chunks.append(chunk)
+            yield chunk
+    if is_cacheable:
+        content = b"".join(content_chunks)
+        cache_metadata["content_sha256"] = hashlib.sha256(content).hexdigest()
+        try:
+            os.makedirs(os.path.dirname(cache_filepath_prefix), exist_ok=True)
+            _write_file_atomically(cache_content_filepath, content)
+            # the metadata is written last, so it is only valid when the content is complete
+            _write_file_atomically(cache_metadata_filepath, json.dumps(cache_metadata).encode("utf-8"))
+        except OSError:
+            pass  # caching is optional
+
+
+def _iter_selected_texts(url, selector, attribute, incremental):
+    # type: (Text, Text, Optional[Text], bool) -> Generator[Text, None, None]
+    """Download a web page and yield the attribute values or inner texts of all html tags matching a css selector.
+
+    The page is parsed while it is downloaded. In incremental mode, texts are yielded as soon as the corresponding html
+    tags are completely parsed, so the caller can stop the iteration (and the download) when enough texts were found.
+    Otherwise, all texts are yielded after the complete page has been parsed.
+
+    :param url: url of the web page
+    :type url: Text
+    :param selector: css selector for html tag filtering
+    :type selector: Text
+    :param attribute: attribute to extract; if ``None``, the inner text is extracted instead
+    :type attribute: Optional[Text]
+    :param incremental: yield texts while the page is still being downloaded
+    :type incremental: bool
+    :returns: a generator over the extracted texts
+    :rtype: Generator[Text, None, None]
+
+    """
+    from lxml import etree  # noqa: F811
+
+    chunks = _iter_page_chunks(url)
+    try:
+        if not incremental:
+            parser = etree.HTMLParser()
+            for chunk in chunks:
+                parser.feed(chunk)
+            try:
+                document = parser.close()
+            except etree.XMLSyntaxError:
+                return  # empty page
+            if document is not None:
+                # the XPath expression only selects attribute values or texts
+                yield from cast(List[Text], _selector_xpath(selector, attribute)(document))
+            return
+        # Matching html tags are only complete if they are not open anymore (their end tag was parsed)
+        pull_parser = etree.HTMLPullParser(events=("start", "end"))
+        element_xpath = _selector_xpath(selector, None, select_elements=True)
+        root = None  # type: Any
+        open_elements = []  # type: List[Any]
+        visited_elements = set()  # type: Set[Any]
+
+        def complete_texts():
+            # type: () -> Iterator[Text]
+            """Process the pending parser events and return the texts of all new matching and complete html tags.
+
+            :returns: an iterator over the texts of html tags that were not returned before
+            :rtype: Iterator[Text]
 
             """
-            return None
+            nonlocal root
+            for event, element in pull_parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = element
+                    open_elements.append(element)
+                else:
+                    open_elements.pop()
+            if root is None:
+                return
+            for element in cast(List[Any], element_xpath(root)):
+                if element in visited_elements or element in open_elements:
+                    continue
+                visited_elements.add(element)
+                text = element.get(attribute) if attribute is not None else element.text
+                if text is not None:
+                    yield text
+
+        for chunk in chunks:
+            pull_parser.feed(chunk)
+            yield from complete_texts()
+        try:
+            pull_parser.close()
+        except etree.XMLSyntaxError:
+            return  # empty page
+        yield from complete_texts()
+    finally:
+        chunks.close()
+
+
+def _github_tag_names(match_obj):
+    # type: (Match) -> Optional[List[Text]]
+    """Query the tag names of a GitHub repository with the GitHub REST API.
+
+    For a releases page, only the tag names of releases are returned.
+
+    :param match_obj: match of a GitHub releases or tags page url containing the owner, the repository name and the page
+                      type (``releases`` or ``tags``)
+    :type match_obj: Match
+    :returns: the tag names or ``None`` if the API request failed
+    :rtype: Optional[List[Text]]
 
-    cast = lambda t, x: x  # type: ignore  # noqa: E731
-    AnyStr = None  # type: ignore
-    Callable = TypeDummyClass()  # type: ignore
-    Iterable = TypeDummyClass()  # type: ignore
-    Text = unicode if sys.version_info.major < 3 else str  # type: ignore
-    Union = TypeDummyClass()  # type: ignore
+    """
+    owner, repository, page_type = match_obj.groups()
+    api_url = "https://api.github.com/repos/{}/{}/{}?per_page=100".format(owner, repository, page_type)
+    return _api_tag_names(
+        api_url, {"Accept": "application/vnd.github+json"}, "tag_name" if page_type == "releases" else "name"
+    )
 
-    def NamedTuple(name, fields_with_types):  # type: ignore
-        """Create a named tuple without type information.
 
-        This function is only needed if the ``typing`` module is not available to keep compatible with existing code.
-        It takes arguments for ``typing.NamedTuple`` and creates a ``collections.namedtuple`` without type information.
-        """
-        fields = zip(*fields_with_types)[0]
-        return collections.namedtuple(name, fields)
+def _gitlab_tag_names(match_obj):
+    # type: (Match) -> Optional[List[Text]]
+    """Query the tag names of a GitLab repository with the GitLab REST API.
 
+    For a releases page, only the tag names of releases are returned.
 
-PY2 = sys.version_info.major < 3  # is needed for correct mypy checking
-DEFAULT_VERSION_PATTERN = r"[vV]?(\d+)\.(\d+)(?:\.(\d+))?$"
-MAX_TRIES_FOR_PAGE_DOWNLOAD = 3
-WAIT_TIME_BETWEEN_PAGE_DOWNLOAD_TRIES = 10
-KNOWN_FILE_EXTENSIONS = ("gzip", "tar", "tgz", "tar.gz", "tar.bz2", "tar.xz", "zip")
+    :param match_obj: match of a GitLab releases or tags page url containing the server url, the project path and the
+                      page type (``releases`` or ``tags``)
+    :type match_obj: Match
+    :returns: the tag names or ``None`` if the API request failed
+    :rtype: Optional[List[Text]]
+
+    """
+    server_url, project_path, page_type = match_obj.groups()
+    if page_type == "releases":
+        api_path = "releases"
+    else:
+        api_path = "repository/tags"
+    api_url = "{}/api/v4/projects/{}/{}?per_page=100".format(
+        server_url, urllib.parse.quote(project_path, safe=""), api_path
+    )
+    return _api_tag_names(api_url, {"Accept": "application/json"}, "tag_name" if page_type == "releases" else "name")
 
-VersionMatch = NamedTuple("VersionMatch", [("complete_match", Text), ("groups", Iterable[Text])])
 
+def _api_tag_names(api_url, headers, name_key):
+    # type: (Text, Dict[Text, Text], Text) -> Optional[List[Text]]
+    """Download a paginated JSON list of tag or release objects and extract their tag names.
 
-def is_string(item):
-    # type: (Any) -> bool
-    """Check if a given item is a string.
+    All pages are requested by following the ``next`` links of the ``Link`` response header since the APIs do not
+    return the tags in version order. To save the API rate limit, at most ``MAX_API_PAGES_FOR_TAG_QUERY`` pages are
+    requested; if there are more pages, ``None`` is returned since the latest tag could be missing.
 
-    :param item: item to check
-    :type item: Any
-    :returns: the test result
-    :rtype: bool
+    :param api_url: API url that returns a JSON list of objects with a tag name attribute
+    :type api_url: Text
+    :param headers: additional request headers
+    :type headers: Dict[Text, Text]
+    :param name_key: JSON attribute that contains the tag name
+    :type name_key: Text
+    :returns: the tag names or ``None`` if an API request failed or there are too many tags
+    :rtype: Optional[List[Text]]
 
     """
-    return isinstance(item, basestring if PY2 else str)
+    import requests  # noqa: F811
+
+    tag_names = []  # type: List[Text]
+    next_url = api_url  # type: Optional[Text]
+    try:
+        for _ in range(MAX_API_PAGES_FOR_TAG_QUERY):
+            if next_url is None:
+                break
+            response = _session().get(next_url, headers=headers, timeout=PAGE_DOWNLOAD_TIMEOUT)
+            if response.status_code != 200:
+                return None
+            tag_names.extend(tag[name_key] for tag in response.json())
+            next_url = response.links.get("next", {}).get("url")
+    except (requests.exceptions.RequestException, ValueError, KeyError, TypeError):
+        return None
+    if next_url is not None:
+        return None
+    return tag_names
+
+
+# Websites with an API that returns tag names directly; these are tried before scraping the given html page
+_FAST_PATHS = (
+    (re.compile(r"https://github\.com/([^/]+)/([^/]+)/(releases|tags)/?(?:[?#].*)?$"), _github_tag_names),
+    (re.compile(r"(https://gitlab\.com)/(.+?)/-/(releases|tags)/?(?:[?#].*)?$"), _gitlab_tag_names),
+)  # type: Tuple[Tuple[typing.Pattern, Callable[[Match], Optional[List[Text]]]], ...]
+
+
+def _disk_memoize(ttl, filepath):
+    # type: (float, Text) -> Callable[[Callable[..., Any]], Callable[..., Any]]
+    """Create a decorator that caches the results of the decorated function in a SQLite database on disk.
+
+    Results are stored by function name and arguments and are reused for ``ttl`` seconds. Arguments that refer to
+    existing local paths (like a local git repository) are identified by their absolute path, so relative paths used in
+    different working directories do not share results. ``None`` results are not stored since they are often caused by
+    temporary failures. Calls with arguments that cannot be serialized to JSON (for example custom sort key functions)
+    are never cached. The decorated function accepts an additional keyword argument ``use_cache`` which can be set to
+    ``False`` to bypass the cache. The first positional argument is ignored, so the decorator can be applied to class
+    methods.
+
+    :param ttl: time in seconds after which a cached result expires
+    :type ttl: float
+    :param filepath: path of the SQLite database
+    :type filepath: Text
+    :returns: the decorator
+    :rtype: Callable[[Callable[..., Any]], Callable[..., Any]]
+
+    """
+
+    def key_argument(argument):
+        # type: (Any) -> Any
+        """Return the representation of an argument in the cache key.
+
+        :param argument: argument of the decorated function
+        :type argument: Any
+        :returns: the absolute path if the argument refers to an existing local path, otherwise the argument itself
+        :rtype: Any
+
+        """
+        if isinstance(argument, str) and os.path.exists(argument):
+            return os.path.abspath(argument)
+        return argument
+
+    def decorator(func):
+        # type: (Callable[..., Any]) -> Callable[..., Any]
+        @functools.wraps(func)
+        def memoized_func(*args, **kwargs):
+            # type: (*Any, **Any) -> Any
+            use_cache = kwargs.pop("use_cache", True)
+            if not use_cache:
+                return func(*args, **kwargs)
+            try:
+                call_description = json.dumps(
+                    [
+                        func.__name__,
+                        [key_argument(argument) for argument in args[1:]],
+                        sorted((name, key_argument(argument)) for name, argument in kwargs.items()),
+                    ]
+                )
+            except TypeError:
+                return func(*args, **kwargs)
+            key = hashlib.sha256(call_description.encode("utf-8")).hexdigest()
+            try:
+                os.makedirs(os.path.dirname(filepath), exist_ok=True)
+                connection = sqlite3.connect(filepath, timeout=10)
+            except (OSError, sqlite3.Error):
+                return func(*args, **kwargs)
+            try:
+                try:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, timestamp REAL, result TEXT)"
+                    )
+                    row = connection.execute(
+                        "SELECT result FROM results WHERE key = ? AND timestamp > ?", (key, time.time() - ttl)
+                    ).fetchone()
+                except sqlite3.Error:
+                    return func(*args, **kwargs)
+                if row is not None:
+                    return json.loads(row[0])
+                result = func(*args, **kwargs)
+                if result is None:
+                    return result
+                try:
+                    with connection:
+                        connection.execute(
+                            "INSERT OR REPLACE INTO results VALUES (?, ?, ?)", (key, time.time(), json.dumps(result))
+                        )
+                except sqlite3.Error:
+                    pass  # caching is optional
+                return result
+            finally:
+                connection.close()
+
+        return memoized_func
+
+    return decorator
+
+
+def _int_or_text(version_component):
+    # type: (Text) -> Union[int, Text]
+    """Convert a version component to an int if possible.
+
+    :param version_component: version component to convert
+    :type version_component: Text
+    :returns: the version component as int or the unmodified version component if it is not numeric
+    :rtype: Union[int, Text]
+
+    """
+    try:
+        return int(version_component)
+    except ValueError:
+        return version_component
 
 
 def default_sort_key(elem):
@@ -114,55 +588,102 @@ def default_sort_key(elem):
     :rtype: Tuple[Union[int, Text], ...]
 
     """
-    version_components = (c for c in elem.groups if c is not None)  # type: Iterator[Text]
-    return tuple(cast(Union[int, Text], int(c) if c.isdigit() else c) for c in version_components)
+    return tuple(_int_or_text(c) for c in elem.groups if c is not None)
+
+
+def _head_status_codes(urls):
+    # type: (List[Text]) -> List[int]
+    """Send concurrent ``HEAD`` requests to the given urls and return the response status codes.
+
+    If ``httpx`` with HTTP/2 support is installed, all requests to the same host are multiplexed over a single
+    connection. Otherwise, the requests are sent with the shared ``requests`` session.
+
+    :param urls: urls to query
+    :type urls: List[Text]
+    :returns: the status code for each url
+    :rtype: List[int]
+
+    """
+    if not urls:
+        return []
+    try:
+        import httpx
+    except ImportError:
+        httpx = None
+    httpx_client = None
+    if httpx is not None:
+        try:
+            httpx_client = httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_connections=MAX_CONCURRENT_URL_VERIFICATIONS),
+                timeout=httpx.Timeout(URL_VERIFICATION_TIMEOUT[1], connect=URL_VERIFICATION_TIMEOUT[0]),
+            )
+        except ImportError:
+            # the ``h2`` package for HTTP/2 support is missing
+            pass
+    if httpx_client is not None:
+        head = httpx_client.head  # type: Callable[[Text], Any]
+    else:
+        session = _session()
+        head = lambda url: session.head(url, timeout=URL_VERIFICATION_TIMEOUT, allow_redirects=False)
+    try:
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_URL_VERIFICATIONS, len(urls))) as executor:
+            return [response.status_code for response in executor.map(head, urls)]
+    finally:
+        if httpx_client is not None:
+            httpx_client.close()
 
 
-def url_verifier(key_func, url_to_verify):
-    # type: (Callable[[VersionMatch], Any], Text) -> Callable[[VersionMatch], Any]
+def _digits_only_sort_key(elem):
+    # type: (VersionMatch) -> Tuple[int, ...]
+    """Transform version strings matched by ``DEFAULT_VERSION_PATTERN`` to int tuples for comparison.
+
+    This is a faster variant of :func:`default_sort_key` for version strings whose groups only consist of digits.
+
+    :param elem: version string
+    :type elem: VersionMatch
+    :returns: version int tuple
+    :rtype: Tuple[int, ...]
+
+    """
+    return tuple(int(c) for c in elem.groups if c is not None)
+
+
+def url_verifier(url_to_verify, elems):
+    # type: (Text, Iterable[VersionMatch]) -> List[VersionMatch]
     """Verify VersionMatch objects by a given url.
 
-    This function takes a key function :code:`key_func` and returns a modified key function that filters elements which
-    cannot be verified by a given url. This is useful to filter all versions without a release tarball.
+    This function filters all elements which cannot be verified by a given url. This is useful to filter all versions
+    without a release tarball. All elements are verified concurrently with ``HEAD`` requests.
 
-    :param key_func: key func to modify
-    :type key_func: Callable[[VersionMatch], Any]
     :param url_to_verify: url to use for the filter process. The url must contain a placeholder ``{}`` for the currently
                           filtered version string. The parentheses can contain an optional expression to manipulate the
                           version string (:code:`x` is the version string placeholder). For example, the expression
-                          :code:`x[1:]` would discard the first character of each version string.
+                          :code:`x[1:]` would discard the first character of each version string. Only common builtin
+                          functions without side effects (like :code:`str`, :code:`int` or :code:`len`) are available
+                          in the expression.
     :type url_to_verify: Text
-    :returns: returns a new key function that will return ``False`` if the url cannot be verified and the return value
-              of the original :code:`key_func` otherwise.
-    :rtype: Callable[[VersionMatch],
+    :param elems: ``VersionMatch`` objects to verify
+    :type elems: Iterable[VersionMatch]
+    :returns: all elements whose url could be verified (in the given order)
+    :rtype: List[VersionMatch]
 
     """
-    match_obj = re.search(r"\{(.+)\}", url_to_verify)
+    elems = list(elems)
+    match_obj = _URL_PLACEHOLDER_RE.search(url_to_verify)
     if match_obj is not None:
-        filter_func = eval("lambda x: {}".format(match_obj.group(1)))
+        filter_func = eval(_compiled_filter_expression(match_obj.group(1)), {"__builtins__": _URL_FILTER_BUILTINS}, {})
     else:
         filter_func = lambda x: x
-    url_to_verify = re.sub(r"\{(.+)\}", "{}", url_to_verify)
-
-    def modified_key_func(elem):
-        # type: (VersionMatch) -> Any
-        """Return a modified version of the given key function :code:`key_func`.
-
-        :param elem: a ``VersionMatch`` object to verfiy
-        :type elem: VersionMatch
-        :returns: ``False`` if the url cannot be verified and the return value of the original :code:`key_func`
-                  otherwise.
-        :rtype: Any
-
-        """
-        url = url_to_verify.format(filter_func(elem.complete_match))
-        response = requests.head(url)
-        if response.status_code == 200:
-            return key_func(elem)
-        else:
-            return False
-
-    return modified_key_func
+    url_to_verify = _URL_PLACEHOLDER_RE.sub("{}", url_to_verify)
+    complete_matches = list(set(elem.complete_match for elem in elems))
+    urls = [url_to_verify.format(filter_func(complete_match)) for complete_match in complete_matches]
+    verified = set(
+        complete_match
+        for complete_match, status_code in zip(complete_matches, _head_status_codes(urls))
+        if status_code == 200
+    )  # type: Set[Text]
+    return [elem for elem in elems if elem.complete_match in verified]
 
 
 class InvalidArgumentCount(Exception):
@@ -174,6 +695,8 @@ class InvalidArgumentCount(Exception):
 class AttributeDict(dict):
     """Class that extends the Python standard dict with attribute access."""
 
+    __slots__ = ()
+
     def __getattr__(self, attr):
         # type: (str) -> Any
         """Return a dict value for a given key ``attr``.
@@ -193,7 +716,7 @@ class AttributeDict(dict):
         :rtype: Any
 
         """
-        return self[attr]
+        return dict.__getitem__(self, attr)
 
     def __setattr__(self, attr, value):
         # type: (str, Any) -> None
@@ -214,16 +737,17 @@ class AttributeDict(dict):
         :type attr: Any
 
         """
-        self[attr] = value
+        dict.__setitem__(self, attr, value)
 
 
-class VersionQuery(object):
+class VersionQuery:
     """Class that contains functions to get software version information from different sources.
 
     This actually only a namespace for different version query functions and not a real class.
     """
 
     @classmethod
+    @_disk_memoize(VERSION_CACHE_TTL, VERSION_CACHE_FILEPATH)
     def last_git_tag(
         cls, repo_url, optional_tag_pattern=None, url_to_verify=None, optional_sort_key=None, multiple_versions=True
     ):
@@ -254,36 +778,93 @@ class VersionQuery(object):
         :rtype: Optional[List[Text]]
 
         """
+
+        def decoded_version_match(match_obj):
+            # type: (Match[bytes]) -> VersionMatch
+            """Convert a match of the raw git output to a ``VersionMatch``.
+
+            :param match_obj: match of a tag pattern
+            :type match_obj: Match[bytes]
+            :returns: the decoded tag name and match groups
+            :rtype: VersionMatch
+
+            """
+            return VersionMatch(
+                match_obj.group().decode("utf-8", "replace"),
+                tuple(group.decode("utf-8", "replace") if group is not None else None for group in match_obj.groups()),
+            )
+
+        # Match the raw git output; only the matching tags are decoded (without failing on malformed tag names)
         if optional_tag_pattern is not None:
-            tag_pattern = optional_tag_pattern
+            tag_re = _compiled(optional_tag_pattern.encode("utf-8"))
+            # Let git filter the tags by the literal prefix of a custom pattern (like ``llvmorg-``) already
+            tag_prefix = _literal_prefix(optional_tag_pattern)
         else:
-            tag_pattern = DEFAULT_VERSION_PATTERN
+            tag_re = _compiled(DEFAULT_VERSION_PATTERN_BYTES)
+            tag_prefix = ""
         if optional_sort_key is not None:
             sort_key = optional_sort_key
+        elif optional_tag_pattern is None:
+            sort_key = _digits_only_sort_key
         else:
             sort_key = default_sort_key
-        if url_to_verify is not None:
-            sort_key = url_verifier(sort_key, url_to_verify)
-        search_pattern = "refs/tags/{}".format(tag_pattern)
-        all_tags = subprocess.check_output(
-            ("git", "ls-remote", "--tags", repo_url), universal_newlines=True
-        ).splitlines()
+        # Git's version sort (``--sort=-v:refname``) is not used: it separates tags by their leading character (for
+        # example ``v1.0`` and ``1.0``) and orders zero-padded components (like ``2024.09``) differently than the int
+        # key does, so all tags are ranked here anyway and git can stream the refs in refname order without sorting.
+        has_default_sort_key = optional_tag_pattern is None and optional_sort_key is None
+        needed_tags = 3 if multiple_versions else 1
+        git_command = (
+            "git",
+            "-c",
+            "protocol.version=2",
+            "ls-remote",
+            "--refs",
+            "--tags",
+            repo_url,
+        )  # type: Tuple[Text, ...]
+        if tag_prefix:
+            git_command += ("refs/tags/{}*".format(tag_prefix),)
+        # Without url verification, only the best tags are kept while reading the git output: ``last_tags`` is a
+        # min-heap of ``(sort key, negated position, match object)`` tuples, so on equal sort keys the earlier tag wins
+        # (like in ``max``). Only the final tags are decoded.
+        last_tags = []  # type: List[Tuple[Any, int, Match[bytes]]]
         filtered_tags = []  # type: List[VersionMatch]
-        for tag in all_tags:
-            match_obj = re.search(search_pattern, tag)
-            if match_obj:
-                filtered_tags.append(VersionMatch(match_obj.group()[len("refs/tags/") :], match_obj.groups()))
-        if filtered_tags:
-            if not multiple_versions:
-                last_tag = max(filtered_tags, key=sort_key)
-                return [last_tag.complete_match]
-            else:
-                last_tags = sorted(filtered_tags, key=sort_key, reverse=True)
-                return [last_tag.complete_match for last_tag in last_tags[: min(3, len(last_tags))]]
-        else:
-            return None
+        with subprocess.Popen(git_command, stdout=subprocess.PIPE, bufsize=1 << 20) as git_process:
+            # process the tags as soon as git outputs them instead of buffering the complete output
+            for position, line in enumerate(cast(IO[bytes], git_process.stdout)):
+                # each line has the format ``<sha>\trefs/tags/<tag>``
+                _, _, ref = line.partition(b"\t")
+                if not ref.startswith(_TAG_REF_PREFIX):
+                    continue
+                match_obj = tag_re.match(ref.rstrip(b"\n"), _TAG_REF_PREFIX_LENGTH)
+                if not match_obj:
+                    continue
+                if url_to_verify is not None:
+                    filtered_tags.append(decoded_version_match(match_obj))
+                    continue
+                if has_default_sort_key:
+                    # equivalent to ``_digits_only_sort_key``, ``int`` also parses the ascii digits of bytes objects
+                    tag_key = tuple(int(group) for group in match_obj.groups() if group is not None)
+                else:
+                    tag_key = sort_key(decoded_version_match(match_obj))
+                if len(last_tags) < needed_tags:
+                    heapq.heappush(last_tags, (tag_key, -position, match_obj))
+                else:
+                    heapq.heappushpop(last_tags, (tag_key, -position, match_obj))
+        if git_process.returncode != 0:
+            raise subprocess.CalledProcessError(git_process.returncode, git_command)
+        if url_to_verify is not None:
+            verified_tags = url_verifier(url_to_verify, filtered_tags)
+            if verified_tags:
+                # ``nlargest`` is stable, so on equal sort keys the earlier tag wins (like in ``max``)
+                last_verified_tags = heapq.nlargest(needed_tags, verified_tags, key=sort_key)
+                return [last_tag.complete_match for last_tag in last_verified_tags]
+        elif last_tags:
+            return [match_obj.group().decode("utf-8", "replace") for _, _, match_obj in sorted(last_tags, reverse=True)]
+        return None
 
     @classmethod
+    @_disk_memoize(VERSION_CACHE_TTL, VERSION_CACHE_FILEPATH)
     def last_website_version(
         cls,
         website_url,
@@ -292,14 +873,21 @@ class VersionQuery(object):
         optional_version_pattern=None,
         optional_sort_key=None,
         multiple_versions=False,
+        optional_already_sorted_desc=False,
     ):
-        # type: (Text, Text, Optional[Text], Optional[Text], Optional[Callable[[VersionMatch], Any]], bool) -> Optional[List[Text]]
+        # type: (Text, Text, Optional[Text], Optional[Text], Optional[Callable[[VersionMatch], Any]], bool, bool) -> Optional[List[Text]]
         """Find the latest version by parsing a website.
 
         This function filters a given website by a css selector and extracts either the inner text or the an attribute
         of the found html tags. Afterwards, the result list is filtered again by a regex version pattern. The maximum
         of the remaining list is then returned as latest version.
 
+        For GitHub and GitLab releases and tags pages (like ``https://github.com/<owner>/<repository>/releases``), the
+        tag names of all releases or tags are queried from the corresponding REST API first and the version pattern is
+        applied to the tag names (the API results are not assumed to be sorted). The page is only scraped with the
+        given selector and attribute if the API request fails, the repository has too many tags or none of the tag
+        names matches the version pattern.
+
         :param website_url: url of the website which will be filtered
         :type website_url: Text
         :param selector: css selector for html tag filtering
@@ -315,6 +903,11 @@ class VersionQuery(object):
         :param multiple_versions: If set to `true`, return a list with the latest three version entries instead of a
                                   single one
         :type multiple_versions: bool
+        :param optional_already_sorted_desc: If set to `true`, assume that the website lists the latest versions first.
+                                             The first matching versions are returned in page order without applying
+                                             the sort key and the download is stopped as soon as enough versions were
+                                             found.
+        :type optional_already_sorted_desc: bool
         :returns: the latest version(s) extracted from the given website that matches all critera
         :rtype: Optional[List[Text]]
 
@@ -332,50 +925,82 @@ class VersionQuery(object):
             :rtype: Text
 
             """
-            basename = os.path.basename(filepath)
-            basename_without_extension = None  # type: Optional[Text]
-            for file_extension in KNOWN_FILE_EXTENSIONS:
-                if basename.endswith(".{}".format(file_extension)):
-                    basename_without_extension = basename[: -(len(file_extension) + 1)]
-                    break
-            return basename_without_extension if basename_without_extension is not None else basename
+            # urls and html paths are always separated by forward slashes, independent of the platform
+            basename = filepath.rpartition("/")[2]
+            if basename.endswith(KNOWN_DOTTED_EXTENSIONS):
+                file_extension = next(e for e in KNOWN_DOTTED_EXTENSIONS if basename.endswith(e))
+                return basename[: -len(file_extension)]
+            return basename
 
         attribute = optional_attribute
-        if optional_version_pattern is not None:
-            version_pattern = optional_version_pattern
-        else:
-            version_pattern = DEFAULT_VERSION_PATTERN
         if optional_sort_key is not None:
             sort_key = optional_sort_key
+        elif optional_version_pattern is None:
+            sort_key = _digits_only_sort_key
         else:
             sort_key = default_sort_key
-        for _ in range(MAX_TRIES_FOR_PAGE_DOWNLOAD):
-            response = requests.get(website_url)
-            if response.status_code == 200:
-                break
-            time.sleep(WAIT_TIME_BETWEEN_PAGE_DOWNLOAD_TRIES)
-        else:
-            raise requests.exceptions.HTTPError("{} could not be downloaded".format(website_url))
-        response_pq = PyQuery(response.text)
-        version_html_tags_pq = response_pq.find(selector)
-        if attribute is not None:
-            version_texts = [html_tag.attrib[attribute].strip() for html_tag in version_html_tags_pq]
+        needed_versions = 3 if multiple_versions else 1
+        if optional_version_pattern is None:
+            version_re = _FUSED_VERSION_RE
         else:
-            version_texts = [html_tag.text.strip() for html_tag in version_html_tags_pq]
-        filtered_versions = []  # type: List[VersionMatch]
-        for version_text in version_texts:
-            # assume that ``version_text`` can be a path (or url)
-            match_obj = re.search(version_pattern, remove_path_components(version_text))
-            if match_obj:
-                filtered_versions.append(VersionMatch(match_obj.group(), match_obj.groups()))
-        if filtered_versions:
-            if not multiple_versions:
-                last_version = max(filtered_versions, key=sort_key)
-                return [last_version.complete_match]
-            else:
-                last_versions = sorted(filtered_versions, key=sort_key, reverse=True)
-                return [last_version.complete_match for last_version in last_versions[: min(3, len(last_versions))]]
-        return None
+            version_re = _compiled(optional_version_pattern)
+
+        def latest_versions(version_texts, is_sorted_desc):
+            # type: (Iterable[Text], bool) -> Optional[List[Text]]
+            """Filter version texts by the version pattern and return the latest versions.
+
+            :param version_texts: texts that possibly contain a version number
+            :type version_texts: Iterable[Text]
+            :param is_sorted_desc: assume that ``version_texts`` lists the latest versions first and return the first
+                                   matches without applying the sort key
+            :type is_sorted_desc: bool
+            :returns: the latest version(s) or ``None`` if no text matches the version pattern
+            :rtype: Optional[List[Text]]
+
+            """
+            # min-heap of ``(sort key, negated position, VersionMatch)`` tuples with the best versions found so far;
+            # on equal sort keys the earlier version wins (like in ``max``)
+            last_versions = []  # type: List[Tuple[Any, int, VersionMatch]]
+            # if the texts are already sorted, the first matches are the latest versions
+            first_versions = []  # type: List[Text]
+            for position, version_text in enumerate(version_texts):
+                if optional_version_pattern is None:
+                    match_obj = version_re.search(version_text.strip())
+                else:
+                    # assume that ``version_text`` can be a path (or url)
+                    match_obj = version_re.search(remove_path_components(version_text.strip()))
+                if not match_obj:
+                    continue
+                if is_sorted_desc:
+                    first_versions.append(match_obj.group())
+                    if len(first_versions) >= needed_versions:
+                        break
+                    continue
+                version_match = VersionMatch(match_obj.group(), match_obj.groups())
+                if len(last_versions) < needed_versions:
+                    heapq.heappush(last_versions, (sort_key(version_match), -position, version_match))
+                else:
+                    heapq.heappushpop(last_versions, (sort_key(version_match), -position, version_match))
+            if first_versions:
+                return first_versions
+            if last_versions:
+                return [last_version.complete_match for _, _, last_version in sorted(last_versions, reverse=True)]
+            return None
+
+        for url_re, query_tag_names in _FAST_PATHS:
+            url_match_obj = url_re.match(website_url)
+            if url_match_obj:
+                tag_names = query_tag_names(url_match_obj)
+                if tag_names is not None:
+                    versions = latest_versions(tag_names, False)
+                    if versions is not None:
+                        return versions
+                break
+        page_texts = _iter_selected_texts(website_url, selector, attribute, incremental=optional_already_sorted_desc)
+        try:
+            return latest_versions(page_texts, optional_already_sorted_desc)
+        finally:
+            page_texts.close()
 
 
 argument_to_function = {
@@ -389,10 +1014,37 @@ argument_to_value_count_range = {
 }  # type: Dict[Text, Tuple[int, int]]
 
 
+class StoreActionInOrder(argparse.Action):
+    """Argparse action that stores the option value and records the order in which actions are given."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        # type: (argparse.ArgumentParser, argparse.Namespace, Any, Optional[Text]) -> None
+        """Store ``values`` in the namespace and append the destination to the ``action_order`` list of the namespace.
+
+        :param parser: the argument parser which invokes this action
+        :type parser: argparse.ArgumentParser
+        :param namespace: the namespace that holds the parsed arguments
+        :type namespace: argparse.Namespace
+        :param values: the option value
+        :type values: Any
+        :param option_string: the option string that was used to invoke this action
+        :type option_string: Optional[Text]
+
+        """
+        setattr(namespace, self.dest, values)
+        # create a new list instead of modifying it in place since the default list is shared between parse calls
+        action_order = [dest for dest in getattr(namespace, "action_order", []) if dest != self.dest]
+        action_order.append(self.dest)
+        setattr(namespace, "action_order", action_order)
+
+
+@functools.lru_cache(maxsize=1)
 def get_argumentparser():
     # type: () -> argparse.ArgumentParser
     """Create an argument parser for the command line interface of this module and return it.
 
+    The parser is created on the first call and reused afterwards.
+
     :returns: argument parser
     :rtype: argparse.ArgumentParser
 
@@ -406,11 +1058,14 @@ latest software versions from different sources.
 """,
     )
     parser.add_argument(
-        "--last-git-tag", action="store", dest="last_git_tag", help="find the latest tagged version in a git repository"
+        "--last-git-tag",
+        action=StoreActionInOrder,
+        dest="last_git_tag",
+        help="find the latest tagged version in a git repository",
     )
     parser.add_argument(
         "--last-website-version",
-        action="store",
+        action=StoreActionInOrder,
         dest="last_website_version",
         help="find the latest tagged version on a website",
     )
@@ -420,6 +1075,20 @@ latest software versions from different sources.
         dest="multi_version",
         help="print the last three versions (separated by newline) instead of only the latest.",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help="always query the version sources instead of reusing results of the last hour.",
+    )
+    parser.add_argument(
+        "--sorted-desc",
+        action="store_true",
+        dest="sorted_desc",
+        help="assume that websites list the latest versions first and stop reading as soon as enough versions were"
+        " found (only affects --last-website-version).",
+    )
+    parser.set_defaults(action_order=[])
     return parser
 
 
@@ -432,12 +1101,12 @@ def parse_arguments():
 
     """
     parser = get_argumentparser()
-    args = AttributeDict({key: value for key, value in vars(parser.parse_args()).items() if value is not None})
+    parsed_args = vars(parser.parse_args())
     args = AttributeDict()
-    for key, value in vars(parser.parse_args()).items():
+    for key, value in parsed_args.items():
         if value is None:
             continue
-        elif not is_string(value):
+        elif not isinstance(value, str):
             args[key] = value
             continue
         value_string = value
@@ -448,8 +1117,8 @@ def parse_arguments():
         else:
             raise InvalidArgumentCount('{:d} argument values are invalid for "{}"'.format(len(values), key))
 
-    if not any(arg in argument_to_function for arg in args):
-        print("Error: No action given", file=sys.stderr)
+    if not (args.keys() & argument_to_function.keys()):
+        sys.stderr.write("Error: No action given\n")
         parser.print_help(file=sys.stderr)
         sys.exit(1)
     return args
@@ -459,18 +1128,33 @@ def main():
     # type: () -> None
     """Run the command line interface of this script.
 
-    Runs the command line interface and is automatically called when this script is run as main script.
+    Runs the command line interface and is automatically called when this script is run as main script. If several
+    actions are given, they are run in parallel and their outputs are printed in the order of the command line options,
+    separated by an empty line. If an action does not find any version, nothing is printed for it (its output block is
+    empty) and the exit code is ``1``.
 
     """
-    was_successful = False
     args = parse_arguments()
-    for arg, values in args.items():
-        if arg in argument_to_function:
-            output = argument_to_function[arg](*values, multiple_versions=args.multi_version)
-            if output is not None:
-                print("\n".join(output))
-                was_successful = True
-            break
+    tasks = [(arg, args[arg]) for arg in args.action_order]
+    # all given actions are independent network queries, so run them in parallel
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = []
+        for arg, values in tasks:
+            kwargs = {"multiple_versions": args.multi_version, "use_cache": not args.no_cache}  # type: Dict[Text, Any]
+            if arg == "last_website_version":
+                kwargs["optional_already_sorted_desc"] = args.sorted_desc
+            futures.append(executor.submit(argument_to_function[arg], *values, **kwargs))
+        outputs = [future.result() for future in futures]
+    was_successful = True
+    for i, output in enumerate(outputs):
+        if i > 0:
+            sys.stdout.write("\n")
+        if output is not None:
+            sys.stdout.write("\n".join(output))
+            sys.stdout.write("\n")
+        else:
+            was_successful = False
+    sys.stdout.flush()
     if was_successful:
         sys.exit(0)
     else: